@@ -32,14 +32,28 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import io
-import pdfplumber  # For reading PDF tables
-from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.styles import getSampleStyleSheet
-from reportlab.lib import colors
-from reportlab.lib.units import inch
-from typing import List, Dict, Tuple, Optional, Any, BinaryIO
-from lxml import etree # Used for HTML parsing, openpyxl needs it
+import os
+import sys
+import csv
+import re
+import hashlib
+from html import escape
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from importlib.util import find_spec
+from types import MappingProxyType
+from typing import List, Dict, Tuple, Optional, Any, BinaryIO, Callable
+# Heavy file-format libraries (pdfplumber, reportlab, openpyxl) are imported lazily
+# inside the functions that use them, so users who never touch PDFs/exports don't pay for them.
+# lxml is still required: pandas uses it for HTML table parsing.
+
+# Faster Excel writer; openpyxl write-only mode is the fallback
+HAS_XLSXWRITER = find_spec('xlsxwriter') is not None
+# Optional faster readers: pyarrow (multi-threaded CSV) and python-calamine (Rust Excel reader)
+HAS_PYARROW = find_spec('pyarrow') is not None
+HAS_CALAMINE = find_spec('python_calamine') is not None
+HAS_XXHASH = find_spec('xxhash') is not None
 
 # ================================================
 # 1. APP CONFIGURATION & INITIALIZATION
@@ -54,6 +68,14 @@ if 'df' not in st.session_state:
     st.session_state['df'] = None
 if 'file_name' not in st.session_state:
     st.session_state['file_name'] = None
+if 'insights' not in st.session_state:
+    st.session_state['insights'] = None  # get_automated_insights(df) result for the current df
+if 'stats' not in st.session_state:
+    st.session_state['stats'] = None  # numeric_summary(df) result for the current df
+if 'exports' not in st.session_state:
+    st.session_state['exports'] = None  # {lang: {'excel'|'html'|'pdf': bytes}} for the current df
+if 'numeric_cols' not in st.session_state:
+    st.session_state['numeric_cols'] = None  # _numeric_positions(df) for the current df
 
 # ================================================
 # 2. TRANSLATIONS & LANGUAGE HELPER
@@ -230,98 +252,301 @@ TRANSLATIONS = {
     }
 }
 
+# Frozen read-only at import (keys interned), then bound so lookups skip the outer dict and its fallback
+TRANSLATIONS = {
+    lang: MappingProxyType({sys.intern(k): v for k, v in table.items()})
+    for lang, table in TRANSLATIONS.items()
+}
+_EN = TRANSLATIONS['en']
+_AR = TRANSLATIONS['ar']
+
 def t(key: str) -> str:
     """
     Translation helper function.
     Fetches a translation string based on the current language in session state.
     """
-    lang = st.session_state.get('lang', 'en')
-    return TRANSLATIONS.get(lang, TRANSLATIONS['en']).get(key, key)
+    return (_AR if st.session_state.get('lang') == 'ar' else _EN).get(key, key)
+
+@lru_cache(maxsize=None)
+def get_translator(lang: str) -> Callable[[str], str]:
+    """
+    Returns a t(key) bound to one language's dict (memoized per language).
+    Used by main() so each render does the session-state and language lookups once, not per call.
+    """
+    table = _AR if lang == 'ar' else _EN
+    def translate(key: str) -> str:
+        return table.get(key, key)
+    return translate
 
 # ================================================
 # 3. DATA LOADING & PARSING HELPERS (WITH CACHING)
 # ================================================
 
-@st.cache_data
-def parse_pdf(file_content: bytes) -> Optional[pd.DataFrame]:
-    """Extract tables from a PDF file."""
-    all_tables = []
+# Parsed uploads are cached in memory only, bounded in count and age (never written to disk)
+PARSER_CACHE_ENTRIES = 16
+PARSER_CACHE_TTL = 3600  # seconds
+
+# Correlations, pivots and forecast series use st.cache_resource: a hit returns the shared
+# object without a pickle copy, so callers must only read it. Bounded like the parser caches.
+ANALYSIS_CACHE_ENTRIES = 32
+ANALYSIS_CACHE_TTL = 3600  # seconds
+
+# Cheap test for "this cell looks like a number" (signs, decimals and exponents included)
+NUMERIC_PATTERN = r'^\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?\s*$'
+
+def _coerce_numeric_col(s: pd.Series) -> pd.Series:
+    """
+    Converts a column to numbers only if every value parses; otherwise it is returned unchanged.
+    A regex scan of the first values skips plain text columns before trying to_numeric.
+    """
+    if pd.api.types.is_numeric_dtype(s):
+        return s
+    sample = s.dropna().head(100)
+    if sample.empty or not sample.astype(str).str.match(NUMERIC_PATTERN).any():
+        return s
     try:
-        with io.BytesIO(file_content) as f:
+        return pd.to_numeric(s, errors='raise')
+    except (ValueError, TypeError):
+        return s
+
+def _coerce_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Runs _coerce_numeric_col over the non-numeric columns only (by position, so
+    duplicate labels are safe); already-numeric columns are not touched or copied.
+    """
+    for i, dtype in enumerate(df.dtypes):
+        if not pd.api.types.is_numeric_dtype(dtype):
+            df.isetitem(i, _coerce_numeric_col(df.iloc[:, i]))
+    return df
+
+def _downcast_numeric(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Shrinks int64 columns to the smallest integer dtype that holds their values
+    (pandas still sums them in int64). Floats stay float64: float32 would lose cents
+    in money columns. Works by position, so duplicate labels are safe.
+    """
+    for i, dtype in enumerate(df.dtypes):
+        if dtype == np.int64:
+            df.isetitem(i, pd.to_numeric(df.iloc[:, i], downcast='integer'))
+    return df
+
+# Each PDF worker is a full process holding its own copy of the file; keep the pool small
+# so concurrent uploads on a shared server don't spawn one process per core each
+PDF_MAX_WORKERS = 4
+
+def _extract_pdf_pages(file_content: bytes, start: int, stop: int) -> List[List[List[Any]]]:
+    """
+    Worker: extracts raw tables from pages [start, stop) of a PDF.
+    Re-opens the PDF from bytes, since an open pdfplumber handle can't be shared across processes.
+    """
+    import pdfplumber  # For reading PDF tables
+    raw_tables = []
+    with io.BytesIO(file_content) as f:
+        with pdfplumber.open(f) as pdf:
+            for page in pdf.pages[start:stop]:
+                raw_tables.extend(table for table in page.extract_tables() if table)
+                # Drop the page's parsed layout objects before moving on, so memory stays flat
+                page.flush_cache()
+    return raw_tables
+
+@st.cache_data(max_entries=PARSER_CACHE_ENTRIES, ttl=PARSER_CACHE_TTL)
+def parse_pdf(_file_content: bytes, digest: str) -> Optional[pd.DataFrame]:
+    """
+    Extract tables from a PDF file (pages are parsed in parallel for larger files).
+    Cached on `digest`; the leading underscore stops Streamlit hashing the raw bytes.
+    """
+    import pdfplumber  # For reading PDF tables
+    # Runs of consecutive tables sharing a header become one DataFrame; runs stay in page order
+    header_runs: List[Tuple[Tuple[Any, ...], List[List[Any]]]] = []
+    try:
+        with io.BytesIO(_file_content) as f:
             with pdfplumber.open(f) as pdf:
-                for page in pdf.pages:
-                    tables = page.extract_tables()
-                    for table in tables:
-                        if table:
-                            all_tables.append(pd.DataFrame(table[1:], columns=table[0]))
+                n_pages = len(pdf.pages)
+
+        if n_pages <= 2:
+            raw_tables = _extract_pdf_pages(_file_content, 0, n_pages)
+        else:
+            # One contiguous page range per worker, so the PDF bytes are sent once per worker
+            workers = min(PDF_MAX_WORKERS, os.cpu_count() or 1, n_pages)
+            step = -(-n_pages // workers)  # ceil division
+            try:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [pool.submit(_extract_pdf_pages, _file_content, i, min(i + step, n_pages))
+                               for i in range(0, n_pages, step)]
+                    raw_tables = [table for fut in futures for table in fut.result()]
+            except Exception:
+                # e.g. process pool unavailable on this platform: fall back to serial parsing
+                raw_tables = _extract_pdf_pages(_file_content, 0, n_pages)
+
+        for table in raw_tables:
+            header = tuple(table[0])
+            if header_runs and header_runs[-1][0] == header:
+                header_runs[-1][1].extend(table[1:])
+            else:
+                header_runs.append((header, list(table[1:])))
     except Exception as e:
         st.error(f"Error reading PDF: {e}")
         return None
     
-    if not all_tables:
+    if not header_runs:
         st.warning(t('pdf_warn'))
         return None
     
-    df = pd.concat(all_tables, ignore_index=True)
+    frames = [pd.DataFrame(rows, columns=list(header)) for header, rows in header_runs]
+    df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+    df = df.dropna(how='all').dropna(axis=1, how='all').reset_index(drop=True)
+    df = _coerce_numeric(df)
     return df
 
-@st.cache_data
-def parse_html(file_content: bytes) -> Optional[pd.DataFrame]:
-    """Extract tables from an HTML file."""
+HTML_WHITESPACE_PATTERN = re.compile(r"[\r\n]+|\s{2,}")  # read_html's cell whitespace cleanup
+
+def _read_simple_html_tables(file_content: bytes) -> Optional[List[pd.DataFrame]]:
+    """
+    Reads plain HTML tables straight from lxml, skipping pd.read_html's per-cell parsing layer.
+    Cells go through the same TextParser as read_html (NA strings, booleans, thousands, header mangling).
+    Returns None (caller falls back to pd.read_html) for anything read_html treats specially:
+    nested tables, row/col spans, <thead>/<tfoot> sections, multi-row headers,
+    style attributes (hidden rows) and <br>.
+    """
+    from lxml import html as lxml_html
+    from pandas.io.parsers import TextParser
+    tree = lxml_html.document_fromstring(file_content, parser=lxml_html.HTMLParser(encoding='utf-8'))
+    tables = tree.xpath('//table')
+    if not tables or tree.xpath(
+            '//table//table | //table//*[@colspan > 1 or @rowspan > 1] | //table//thead | //table//tfoot'
+            ' | //table[@style] | //table//*[@style] | //table//br'):
+        return None
+
+    frames = []
+    for table in tables:
+        trs = [tr for tr in table.xpath('.//tr') if tr.xpath('./td|./th')]
+        if not trs:
+            continue
+        is_th_row = [not tr.xpath('./td') for tr in trs]
+        if len(is_th_row) > 1 and is_th_row[0] and is_th_row[1]:
+            return None  # several <th> rows become a MultiIndex header in read_html
+        rows = [[HTML_WHITESPACE_PATTERN.sub(' ', cell.text_content()).strip() for cell in tr.xpath('./td|./th')]
+                for tr in trs]
+        width = max(len(row) for row in rows)
+        rows = [row + [''] * (width - len(row)) for row in rows]
+        # A first row made only of <th> cells is the header, as in read_html
+        with TextParser(rows, header=0 if is_th_row[0] else None, thousands=',') as parser:
+            frames.append(parser.read())
+    return frames or None
+
+@st.cache_data(max_entries=PARSER_CACHE_ENTRIES, ttl=PARSER_CACHE_TTL)
+def parse_html(_file_content: bytes, digest: str) -> Optional[pd.DataFrame]:
+    """Extract tables from an HTML file. Cached on `digest`, not the raw bytes."""
     try:
-        tables = pd.read_html(io.BytesIO(file_content), encoding='utf-8')
+        try:
+            tables = _read_simple_html_tables(_file_content)
+        except Exception:
+            tables = None
+        if tables is None:
+            tables = pd.read_html(io.BytesIO(_file_content), encoding='utf-8')
         if not tables:
             st.warning(t('html_warn'))
             return None
         
         df = pd.concat(tables, ignore_index=True)
+        df = df.dropna(how='all').dropna(axis=1, how='all').reset_index(drop=True)
+        df = _coerce_numeric(df)
         return df
     except Exception as e:
         st.error(f"{t('file_error')}: {e}")
         return None
 
-@st.cache_data
-def parse_excel_csv(file_content: bytes, file_name: str) -> Optional[pd.DataFrame]:
-    """Read and clean Excel/CSV files with smart header detection."""
+@st.cache_data(max_entries=PARSER_CACHE_ENTRIES, ttl=PARSER_CACHE_TTL)
+def parse_excel_csv(_file_content: bytes, file_name: str, digest: str) -> Optional[pd.DataFrame]:
+    """Read and clean Excel/CSV files with smart header detection. Cached on `digest`, not the raw bytes."""
     name = file_name.lower()
     df = None
-    file_like_object = io.BytesIO(file_content)
+    file_like_object = io.BytesIO(_file_content)
     
     try:
         if name.endswith('.csv'):
-            df = pd.read_csv(file_like_object, header=None, encoding='utf-8', engine='python')
+            # Sniff the delimiter from the first 64KB so a fast parser (pyarrow, else C) can be used
+            try:
+                head = _file_content[:65536].decode('utf-8', errors='replace')
+                sep = csv.Sniffer().sniff(head, delimiters=',;\t|').delimiter
+                if HAS_PYARROW:
+                    df = pd.read_csv(file_like_object, header=None, encoding='utf-8', engine='pyarrow', sep=sep)
+                else:
+                    df = pd.read_csv(file_like_object, header=None, encoding='utf-8', engine='c', sep=sep, low_memory=False)
+            except Exception:
+                # Sniffing failed, or ragged rows the fast parsers reject: use the tolerant python engine
+                file_like_object.seek(0)
+                df = pd.read_csv(file_like_object, header=None, encoding='utf-8', engine='python')
+        elif HAS_CALAMINE:
+            # Rust-backed reader; fall back to openpyxl for workbooks it rejects
+            try:
+                df = pd.read_excel(file_like_object, header=None, engine='calamine')
+            except Exception:
+                file_like_object.seek(0)
+                df = pd.read_excel(file_like_object, header=None, engine='openpyxl')
         else:
             df = pd.read_excel(file_like_object, header=None, engine='openpyxl')
     except Exception as e:
         st.error(f"{t('file_error')}: {e}")
         return None
 
-    # Drop completely empty rows and columns
-    df = df.dropna(how='all').dropna(axis=1, how='all')
-    if df.empty:
+    # Drop completely empty rows and columns; one null mask serves both drops and header detection
+    notnull = df.notna().to_numpy()
+    keep_rows, keep_cols = notnull.any(axis=1), notnull.any(axis=0)
+    if not keep_rows.any():
         return None
+    df = df.iloc[keep_rows, keep_cols]
 
     # Detect header row: pick the row with the most non-null values
-    header_row = df.notna().sum(axis=1).idxmax()
+    # (headers sit near the top, so only the first rows are scanned)
+    header_row = notnull[np.flatnonzero(keep_rows)[:50]][:, keep_cols].sum(axis=1).argmax()
     df.columns = df.iloc[header_row].astype(str).str.strip()
+    # Body rows are a subset of the non-empty rows kept above, so no second dropna is needed
     df = df.iloc[header_row + 1:].reset_index(drop=True)
 
-    # Clean column names: replace Unnamed or blanks
-    df.columns = [
-        col if (isinstance(col, str) and col.strip() != "" and not col.strip().startswith("Unnamed"))
-        else f"Column_{i}"
-        for i, col in enumerate(df.columns)
-    ]
-
-    df = df.dropna(how="all").reset_index(drop=True)
+    # Clean column names: replace Unnamed or blanks (headers are already str-stripped above,
+    # so a vectorized check lets clean sheets skip the per-column relabel)
+    cols = df.columns
+    if (cols.str.len() == 0).any() or cols.str.startswith("Unnamed").any():
+        df.columns = [
+            col if (col != "" and not col.startswith("Unnamed")) else f"Column_{i}"
+            for i, col in enumerate(cols)
+        ]
+
+    # Try converting numeric columns (only the ones not already numeric)
+    df = _coerce_numeric(df)
+
+    # Drop duplicated columns (only copy when there are any)
+    dup_mask = df.columns.duplicated()
+    if dup_mask.any():
+        df = df.loc[:, ~dup_mask]
+    return _downcast_numeric(df)
+
+# File extension -> parser; each is called as parser(file_content, file_name, digest)
+FILE_PARSERS: Dict[str, Callable[[bytes, str, str], Optional[pd.DataFrame]]] = {
+    '.pdf': lambda content, name, digest: parse_pdf(content, digest),
+    '.html': lambda content, name, digest: parse_html(content, digest),
+    '.htm': lambda content, name, digest: parse_html(content, digest),
+    '.csv': parse_excel_csv,
+    '.xls': parse_excel_csv,
+    '.xlsx': parse_excel_csv,
+}
 
-    # Try converting numeric columns
-    for c in df.columns:
-        df[c] = pd.to_numeric(df[c], errors='ignore')
+def content_digest(file_content: bytes) -> str:
+    """Fast cache key for an upload: xxh3 if installed, else BLAKE2b (both hash at GB/s)."""
+    if HAS_XXHASH:
+        import xxhash
+        return xxhash.xxh3_128_hexdigest(file_content)
+    return hashlib.blake2b(file_content, digest_size=16).hexdigest()
 
-    # Drop duplicated columns
-    df = df.loc[:, ~df.columns.duplicated()]
-    return df
+def _reset_df_state(df: Optional[pd.DataFrame] = None, file_name: Optional[str] = None):
+    """Stores the loaded df (or clears it) and drops everything cached for the previous one."""
+    st.session_state['df'] = df
+    st.session_state['insights'] = None
+    st.session_state['stats'] = None
+    st.session_state['exports'] = None
+    st.session_state['numeric_cols'] = _numeric_positions(df) if df is not None else None
+    st.session_state['file_name'] = file_name
 
 def load_data(uploaded_file: BinaryIO):
     """
@@ -334,91 +559,159 @@ def load_data(uploaded_file: BinaryIO):
 
     name = uploaded_file.name
     file_content = uploaded_file.getvalue()
+    # Hash the upload once; the cached parsers key on this digest instead of rehashing the bytes
+    digest = content_digest(file_content)
     df = None
 
     try:
-        if name.lower().endswith('.pdf'):
-            df = parse_pdf(file_content)
-        elif name.lower().endswith(('.html', '.htm')):
-            df = parse_html(file_content)
-        elif name.lower().endswith(('.csv', '.xls', '.xlsx')):
-            df = parse_excel_csv(file_content, name)
-        else:
+        parser = FILE_PARSERS.get(os.path.splitext(name)[1].lower())
+        if parser is None:
             st.error(f"Unsupported file type: {name}")
             return
+        df = parser(file_content, name, digest)
 
         if df is not None and not df.empty:
-            # Post-processing for all loaded data
-            df = df.dropna(how='all').dropna(axis=1, how='all').reset_index(drop=True)
-            for c in df.columns:
-                df[c] = pd.to_numeric(df[c], errors='ignore')
-            
-            st.session_state['df'] = df
-            st.session_state['file_name'] = uploaded_file.name
+            # All parsers return cleaned, numeric-coerced data; no post-processing needed.
+            _reset_df_state(df, uploaded_file.name)
             st.success(f"{t('data_loaded')} '{uploaded_file.name}' ({df.shape[0]} {t('rows')}, {df.shape[1]} {t('cols')})")
         elif df is None:
              # Error was already shown by the parsing function
-             st.session_state['df'] = None
-             st.session_state['file_name'] = None
+             _reset_df_state()
         elif df is not None and df.empty:
              # Warning was already shown by the parsing function
-             st.session_state['df'] = None
-             st.session_state['file_name'] = None
+             _reset_df_state()
 
     except Exception as e:
         st.error(f"{t('file_error')}: {e}")
-        st.session_state['df'] = None
-        st.session_state['file_name'] = None
+        _reset_df_state()
 
 @st.cache_data
 def get_sample_data() -> pd.DataFrame:
-    """Generates sample data."""
+    """Generates sample data (seeded, so it's the same on every run)."""
+    rng = np.random.default_rng(0)
     df = pd.DataFrame({
         'Date': pd.date_range(end=pd.Timestamp.today(), periods=24, freq='MS'),
         'Category': ['A', 'B', 'C'] * 8,
         'Branch': ['North', 'South'] * 12,
-        'Sales': np.random.randint(100, 1000, 24),
-        'Quantity': np.random.randint(1, 50, 24),
-        'Profit': np.random.randint(-50, 300, 24)
+        'Sales': rng.integers(100, 1000, 24, dtype=np.int32),
+        'Quantity': rng.integers(1, 50, 24, dtype=np.int16),
+        'Profit': rng.integers(-50, 300, 24, dtype=np.int32)
     })
     return df
 
 def load_sample_data():
     """Loads sample data into session state."""
     df = get_sample_data()
-    st.session_state['df'] = df
-    st.session_state['file_name'] = 'Sample_Data.csv'
+    _reset_df_state(df, 'Sample_Data.csv')
     st.success(f"{t('data_loaded')} 'Sample_Data.csv' ({df.shape[0]} {t('rows')}, {df.shape[1]} {t('cols')})")
 
 # ================================================
 # 4. ANALYSIS & PLOTTING HELPERS (WITH CACHING)
 # ================================================
 
+def _numeric_positions(df: pd.DataFrame) -> List[int]:
+    """
+    Positions of the numeric columns (a dtype walk only, no data is copied).
+    Positions, unlike labels, stay valid for blank or repeated headers (common in PDF tables).
+    """
+    return [i for i, dtype in enumerate(df.dtypes)
+            if pd.api.types.is_numeric_dtype(dtype)
+            and not pd.api.types.is_bool_dtype(dtype)
+            and not pd.api.types.is_timedelta64_dtype(dtype)]
+
+def _numeric_cols(df: pd.DataFrame) -> List[str]:
+    """Names of the numeric columns (a dtype walk only, no data is copied)."""
+    return [df.columns[i] for i in _numeric_positions(df)]
+
+def _text_cols(df: pd.DataFrame) -> List[str]:
+    """Names of the text columns, object or pandas string dtype (a dtype walk only)."""
+    return [c for c, dtype in df.dtypes.items()
+            if pd.api.types.is_object_dtype(dtype) or pd.api.types.is_string_dtype(dtype)]
+
 @st.cache_data
-def grand_totals(df: pd.DataFrame) -> Tuple[Dict[str, float], float]:
-    """Calculates totals for all numeric columns."""
-    numeric = df.select_dtypes(include=[np.number])
-    totals = numeric.sum(numeric_only=True)
-    grand = totals.sum()
-    return totals.to_dict(), grand
+def numeric_summary(df: pd.DataFrame, positions: Optional[List[int]] = None) -> Tuple[pd.DataFrame, Dict[str, float], float]:
+    """
+    Descriptive statistics plus per-column and grand totals for the numeric columns (or the
+    columns at `positions`, if given), all reduced from a single float64 copy of the numeric block.
+    Columns are taken by position, so blank or repeated headers are safe.
+    Returns (stats, totals_by_column, grand_total).
+    """
+    positions = _numeric_positions(df) if positions is None else positions
+    cols = df.columns[positions].tolist()
+    arr = df.iloc[:, positions].to_numpy(dtype=np.float64, na_value=np.nan)
+    totals = np.nansum(arr, axis=0)
+    totals_dict, grand = dict(zip(cols, totals.tolist())), float(totals.sum())
+    if not cols or df.empty:
+        return pd.DataFrame(), totals_dict, grand
+    # All-NaN columns legitimately yield NaN stats; silence NumPy's warnings about them
+    with warnings.catch_warnings(), np.errstate(invalid='ignore', divide='ignore'):
+        warnings.simplefilter('ignore', category=RuntimeWarning)
+        # Mean and std reuse the totals and counts instead of re-scanning via nanmean/nanstd
+        count = np.count_nonzero(~np.isnan(arr), axis=0)
+        mean = totals / count
+        std = np.where(count > 1, np.sqrt(np.nansum((arr - mean) ** 2, axis=0) / (count - 1)), np.nan)
+        summary = pd.DataFrame({
+            'count': count,
+            'mean': mean,
+            'median': np.nanmedian(arr, axis=0),
+            'max': np.nanmax(arr, axis=0),
+            'min': np.nanmin(arr, axis=0),
+            'std': std,
+        }, index=cols)
+    return summary, totals_dict, grand
+
+@st.cache_resource(max_entries=ANALYSIS_CACHE_ENTRIES, ttl=ANALYSIS_CACHE_TTL)
+def correlation_matrix(num_df: pd.DataFrame, max_cols: Optional[int] = None) -> pd.DataFrame:
+    """
+    Pearson correlation of numeric columns.
+    Without missing values this is a single np.corrcoef call; with NaNs it falls back to
+    pandas' pairwise-complete df.corr() so results don't change. If max_cols is given and
+    exceeded, only the highest-variance columns are kept (the cost grows with columns²).
+    """
+    if max_cols is not None and num_df.shape[1] > max_cols:
+        num_df = num_df[num_df.var().nlargest(max_cols).index]
+    arr = num_df.to_numpy(dtype=np.float64, na_value=np.nan)
+    if np.isnan(arr).any():
+        return num_df.corr()
+    with np.errstate(invalid='ignore', divide='ignore'):  # constant columns give NaN, as in df.corr()
+        corr = np.corrcoef(arr, rowvar=False)
+    return pd.DataFrame(np.atleast_2d(corr), index=num_df.columns, columns=num_df.columns)
 
 @st.cache_data
-def stats_summary(df: pd.DataFrame) -> pd.DataFrame:
-    """Generates descriptive statistics."""
-    numeric = df.select_dtypes(include=[np.number])
-    if numeric.empty:
-        return pd.DataFrame()
-    summary = numeric.agg(['count', 'mean', 'median', 'max', 'min', 'std']).transpose()
-    return summary
+def detect_date_column(df: pd.DataFrame) -> Optional[str]:
+    """
+    Picks the default date column: datetime dtypes first, then a name match,
+    then text columns whose first 500 values mostly parse as dates.
+    """
+    for c, dtype in df.dtypes.items():
+        if pd.api.types.is_datetime64_any_dtype(dtype):
+            return c
+    for c in df.columns:
+        if 'date' in str(c).lower() or 'مبيعات' in str(c).lower():
+            return c
+    for c in _text_cols(df):
+        sample = df[c].dropna().head(500)
+        # Plain numbers would also "parse" as dates; skip columns that are all numeric
+        if sample.empty or pd.to_numeric(sample, errors='coerce').notna().all():
+            continue
+        if pd.to_datetime(sample.astype(str), errors='coerce', format='mixed').notna().mean() > 0.9:
+            return c
+    return None
 
 @st.cache_data
+def missing_counts(df: pd.DataFrame) -> pd.Series:
+    """Missing-value counts for columns that have any (empty if the data is complete)."""
+    # count() reduces per column without materializing a full boolean mask of df
+    missing = len(df) - df.count()
+    return missing[missing > 0]
+
+# Aggregations offered for pivots; pandas runs these string names through its Cython groupby kernels
+PIVOT_AGGS = ['sum', 'mean', 'median', 'count', 'min', 'max', 'std']
+
+@st.cache_resource(max_entries=ANALYSIS_CACHE_ENTRIES, ttl=ANALYSIS_CACHE_TTL)
 def generate_pivot(df: pd.DataFrame, rows: List[str], cols: List[str], values: Optional[str], aggfunc: str) -> Optional[pd.DataFrame]:
     """Generates a pivot table."""
-    agg_map = {
-        'sum': np.sum, 'mean': np.mean, 'median': np.median,
-        'count': 'count', 'min': np.min, 'max': np.max, 'std': np.std,
-    }
-    func = agg_map.get(aggfunc, np.sum)
+    func = aggfunc if aggfunc in PIVOT_AGGS else 'sum'
     try:
         pvt = pd.pivot_table(df, index=rows if rows else None, 
                              columns=cols if cols else None,
@@ -429,10 +722,79 @@ def generate_pivot(df: pd.DataFrame, rows: List[str], cols: List[str], values: O
         st.error(f"Pivot error: {e}")
         return None
 
+@st.cache_data
+def _fit_poly(y: np.ndarray, deg: int) -> Tuple[np.ndarray, float]:
+    """
+    Fits a degree 1 or 2 trend to y over x = 0..n-1.
+    Degree 1 uses closed-form OLS; degree 2 solves the 3x3 normal equations directly (no SVD).
+    Returns the coefficients (highest power first, as np.polyval expects) and the residual std.
+    """
+    y = np.asarray(y, dtype=float)
+    n = y.shape[0]
+    x = np.arange(n, dtype=float)
+    if deg == 1:
+        sx = x.sum(); sy = y.sum()
+        sxx = (x * x).sum(); sxy = (x * y).sum()
+        slope = (n * sxy - sx * sy) / (n * sxx - sx * sx)
+        intercept = (sy - slope * sx) / n
+        coeffs = np.array([slope, intercept])
+    else:
+        # Solve on u = x / scale in [0, 1] to keep the normal matrix well conditioned,
+        # then rescale: a*u^2 + b*u + c == (a/scale^2)*x^2 + (b/scale)*x + c
+        scale = float(n - 1)
+        u = x / scale
+        u2 = u * u
+        s1, s2, s3, s4 = u.sum(), u2.sum(), (u2 * u).sum(), (u2 * u2).sum()
+        A = np.array([[s4, s3, s2], [s3, s2, s1], [s2, s1, n]])
+        b = np.array([(u2 * y).sum(), (u * y).sum(), y.sum()])
+        a2, a1, a0 = np.linalg.solve(A, b)
+        coeffs = np.array([a2 / scale ** 2, a1 / scale, a0])
+    resid_std = float(np.nanstd(y - np.polyval(coeffs, x)))
+    return coeffs, resid_std
+
+def _forecast_kernel(y: np.ndarray, n_future: int, deg: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, float]:
+    """
+    Fits the trend and projects it n_future steps ahead.
+    Returns (preds, lower_band, upper_band, resid_std) with a ±1.96σ band.
+    """
+    n = len(y)
+    coeffs, resid_std = _fit_poly(y, deg)
+    preds = np.polyval(coeffs, np.arange(n, n + n_future))
+    ci = 1.96 * resid_std
+    return preds, preds - ci, preds + ci, resid_std
+
+@st.cache_resource(max_entries=ANALYSIS_CACHE_ENTRIES, ttl=ANALYSIS_CACHE_TTL)
+def _forecast_series(df: pd.DataFrame, date_col: str, fc_col: str) -> Tuple[pd.Series, str]:
+    """
+    One value per parsed date (sorted) plus its inferred frequency ('D' if unknown).
+    Independent of the forecast horizon, so changing the periods slider reuses it.
+    """
+    tmp = df[[date_col, fc_col]].copy()
+    tmp[date_col] = pd.to_datetime(tmp[date_col], errors='coerce', cache=True)
+    tmp = tmp.dropna(subset=[date_col, fc_col])
+    # One value per date: unique dates only need sorting, duplicates are averaged by groupby
+    if tmp[date_col].is_unique:
+        tmp_series = tmp.set_index(date_col)[fc_col]
+        if not tmp_series.index.is_monotonic_increasing:
+            tmp_series = tmp_series.sort_index()
+    else:
+        tmp_series = tmp.groupby(date_col)[fc_col].mean()
+
+    try:
+        freq = pd.infer_freq(tmp_series.index)
+        if freq is None: freq = 'D'
+    except Exception:
+        freq = 'D'
+    return tmp_series, freq
+
+def _line_trace_cls(n_points: int):
+    """go.Scattergl (WebGL) for long series, plain go.Scatter otherwise."""
+    return go.Scattergl if n_points > 1000 else go.Scatter
+
 def run_forecast(df: pd.DataFrame, date_col: Optional[str], fc_col: str, fc_periods: int):
     """
     Runs and plots a simple polynomial forecast.
-    Not cached as it's a quick calculation and should respond to UI changes.
+    Not cached itself so it responds to UI changes; the series prep and the fit are cached helpers.
     """
     if not fc_col:
         st.warning(t('forecast_warn'))
@@ -441,12 +803,7 @@ def run_forecast(df: pd.DataFrame, date_col: Optional[str], fc_col: str, fc_peri
     try:
         if date_col:
             # --- Forecasting with a Date Column ---
-            tmp = df[[date_col, fc_col]].copy()
-            tmp[date_col] = pd.to_datetime(tmp[date_col], errors='coerce')
-            tmp = tmp.dropna(subset=[date_col, fc_col])
-            tmp = tmp.groupby(date_col, as_index=False)[fc_col].mean().sort_values(date_col)
-            tmp_series = tmp.set_index(date_col)[fc_col]
-            tmp_series = tmp_series[~tmp_series.index.duplicated(keep='first')]
+            tmp_series, freq = _forecast_series(df, date_col, fc_col)
             
             # UPDATED: Allow forecast for 2 points (for a straight line)
             if tmp_series.shape[0] < 2:
@@ -458,47 +815,34 @@ def run_forecast(df: pd.DataFrame, date_col: Optional[str], fc_col: str, fc_peri
             if n >= 6:
                 deg = 2 # Use degree 2 (curve) if 6 or more points
                 
-            x = np.arange(n)
-            coeffs = np.polyfit(x, tmp_series.values, deg)
-            model = np.poly1d(coeffs)
-
-            fitted = model(x)
-            resid = tmp_series.values - fitted
-            resid_std = np.nanstd(resid)
-            ci = 1.96 * resid_std
-
-            try:
-                freq = pd.infer_freq(tmp_series.index)
-                if freq is None: freq = 'D'
-            except Exception:
-                freq = 'D'
+            preds, lower, upper, _ = _forecast_kernel(tmp_series.values, int(fc_periods), deg)
             
             last_date = tmp_series.index.max()
             future_index = pd.date_range(start=last_date, periods=int(fc_periods) + 1, freq=freq)[1:]
 
-            future_x = np.arange(n, n + int(fc_periods))
-            preds = model(future_x)
-            
             forecast_df = pd.DataFrame({
                 date_col: future_index,
                 'forecast': preds,
-                'lower_band': preds - ci,
-                'upper_band': preds + ci
+                'lower_band': lower,
+                'upper_band': upper
             })
             
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=tmp_series.index, y=tmp_series.values,
-                                     mode='lines', name=t('actual'), line=dict(color='blue')))
-            fig.add_trace(go.Scatter(x=forecast_df[date_col], y=forecast_df['forecast'],
-                                     mode='lines', name=t('forecast'), line=dict(dash='dash', color='red', width=3)))
-            fig.add_trace(go.Scatter(
-                x=list(forecast_df[date_col]) + list(forecast_df[date_col][::-1]),
-                y=list(forecast_df['upper_band']) + list(forecast_df['lower_band'][::-1]),
-                fill='toself', fillcolor='rgba(255,0,0,0.15)',
-                line=dict(color='rgba(255,255,255,0)'),
-                hoverinfo="skip", showlegend=True, name=t('confidence')
-            ))
-            fig.update_layout(title=f"{fc_col} - {t('forecast')}", xaxis_title=date_col, yaxis_title=fc_col)
+            xs = forecast_df[date_col].to_numpy()
+            traces = [
+                _line_trace_cls(n)(x=tmp_series.index, y=tmp_series.values,
+                           mode='lines', name=t('actual'), line=dict(color='blue')),
+                go.Scatter(x=xs, y=preds,
+                           mode='lines', name=t('forecast'), line=dict(dash='dash', color='red', width=3)),
+                go.Scatter(
+                    x=np.concatenate([xs, xs[::-1]]),
+                    y=np.concatenate([upper, lower[::-1]]),
+                    fill='toself', fillcolor='rgba(255,0,0,0.15)',
+                    line=dict(color='rgba(255,255,255,0)'),
+                    hoverinfo="skip", showlegend=True, name=t('confidence')
+                ),
+            ]
+            # Build traces and layout in one constructor call (validated once)
+            fig = go.Figure(data=traces, layout=dict(title=f"{fc_col} - {t('forecast')}", xaxis_title=date_col, yaxis_title=fc_col))
             st.plotly_chart(fig, use_container_width=True)
             st.subheader(t('forecast_table'))
             st.dataframe(forecast_df.reset_index(drop=True))
@@ -518,34 +862,27 @@ def run_forecast(df: pd.DataFrame, date_col: Optional[str], fc_col: str, fc_peri
                 deg = 2 # Use degree 2 (curve) if 6 or more points
                 
             x = np.arange(n)
-            coeffs = np.polyfit(x, series.values, deg)
-            model = np.poly1d(coeffs)
-            
-            fitted = model(x)
-            resid = series.values - fitted
-            resid_std = np.nanstd(resid)
-            ci = 1.96 * resid_std
-            
+            preds, lower, upper, _ = _forecast_kernel(series.values, int(fc_periods), deg)
             future_x = np.arange(n, n + int(fc_periods))
-            preds = model(future_x)
             
             forecast_df = pd.DataFrame({
                 'index': future_x,
                 'forecast': preds,
-                'lower_band': preds - ci,
-                'upper_band': preds + ci
+                'lower_band': lower,
+                'upper_band': upper
             })
 
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(x=x, y=series.values, mode='lines', name=t('actual')))
-            fig.add_trace(go.Scatter(x=future_x, y=preds, mode='lines', name=t('forecast'), line=dict(dash='dash', color='red', width=3)))
-            fig.add_trace(go.Scatter(
-                x=list(future_x) + list(future_x[::-1]),
-                y=list(preds + ci) + list(preds - ci)[::-1],
-                fill='toself', fillcolor='rgba(255,0,0,0.15)',
-                line=dict(color='rgba(255,255,255,0)'),
-                hoverinfo="skip", showlegend=True, name=t('confidence')
-            ))
+            fig = go.Figure(data=[
+                _line_trace_cls(n)(x=x, y=series.values, mode='lines', name=t('actual')),
+                go.Scatter(x=future_x, y=preds, mode='lines', name=t('forecast'), line=dict(dash='dash', color='red', width=3)),
+                go.Scatter(
+                    x=np.concatenate([future_x, future_x[::-1]]),
+                    y=np.concatenate([upper, lower[::-1]]),
+                    fill='toself', fillcolor='rgba(255,0,0,0.15)',
+                    line=dict(color='rgba(255,255,255,0)'),
+                    hoverinfo="skip", showlegend=True, name=t('confidence')
+                ),
+            ])
             st.plotly_chart(fig, use_container_width=True)
             st.dataframe(forecast_df)
 
@@ -557,49 +894,105 @@ def run_forecast(df: pd.DataFrame, date_col: Optional[str], fc_col: str, fc_peri
 # ================================================
 
 def df_to_excel_bytes(sheets: Dict[str, pd.DataFrame]) -> bytes:
-    """Converts a dictionary of DataFrames to an Excel file in bytes."""
+    """
+    Converts a dictionary of DataFrames to an Excel file in bytes.
+    Uses xlsxwriter when installed, otherwise streams rows through openpyxl's write-only workbook.
+    """
     out = io.BytesIO()
-    with pd.ExcelWriter(out, engine='openpyxl') as writer:
+    if HAS_XLSXWRITER:
+        # in_memory: build worksheets in RAM instead of staging them in temp files
+        with pd.ExcelWriter(out, engine='xlsxwriter', engine_kwargs={'options': {'in_memory': True}}) as writer:
+            for name, df_sheet in sheets.items():
+                if not isinstance(df_sheet, pd.DataFrame):
+                    continue
+                safe_name = str(name)[:31]  # Excel sheet name limit
+                df_sheet.to_excel(writer, sheet_name=safe_name, index=isinstance(df_sheet.index, pd.MultiIndex))
+    else:
+        import openpyxl
+        wb = openpyxl.Workbook(write_only=True)
         for name, df_sheet in sheets.items():
             if not isinstance(df_sheet, pd.DataFrame):
                 continue
-            safe_name = str(name)[:31]  # Excel sheet name limit
-            df_sheet.to_excel(writer, sheet_name=safe_name, index=isinstance(df_sheet.index, pd.MultiIndex))
+            ws = wb.create_sheet(str(name)[:31])  # Excel sheet name limit
+            if isinstance(df_sheet.index, pd.MultiIndex):
+                df_sheet = df_sheet.reset_index()
+            ws.append([str(c) for c in df_sheet.columns])
+            # Missing values must be written as empty cells, not NaN
+            values = df_sheet.astype(object).where(df_sheet.notna(), None)
+            for row in values.itertuples(index=False, name=None):
+                ws.append(row)
+        wb.save(out)
     out.seek(0)
     return out.getvalue()
 
+@st.cache_data(show_spinner=False)
+def preview_html(df_head: pd.DataFrame) -> str:
+    """Renders the report's data preview once per distinct preview (to_html is slow)."""
+    return df_head.to_html(classes='table', border=1, justify='center')
+
+@st.cache_data(show_spinner=False)
+def preview_rows(df_preview: pd.DataFrame) -> List[List[Any]]:
+    """PDF preview table rows (header + body), built once per distinct preview."""
+    # Format float columns in one vectorized C pass; reportlab stringifies the other cells itself
+    body = df_preview.to_numpy(dtype=object)
+    for j, dtype in enumerate(df_preview.dtypes):
+        if pd.api.types.is_float_dtype(dtype):
+            body[:, j] = np.char.mod('%.2f', df_preview.iloc[:, j].to_numpy(dtype=np.float64, na_value=np.nan))
+    return [df_preview.columns.to_list()] + body.tolist()
+
 def create_html_report(df: pd.DataFrame, insights: List[str]) -> bytes:
-    """Generates a simple HTML report."""
-    html = f'<html><head><meta charset="utf-8"><title>{t("title")}</title></head><body>'
-    html += f'<h1>{t("title")}</h1>'
-    html += f'<p>Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>'
-    html += f'<h2>Dataset</h2><p>{t("rows")}: {df.shape[0]} | {t("cols")}: {df.shape[1]}</p>'
-    html += f'<h3>{t("insights")}</h3><ul>'
-    for ins in insights:
-        html += f'<li>{ins}</li>'
-    html += '</ul>'
-    html += f'<h3>{t("show_data")}</h3>'
-    html += df.head(100).to_html(classes='table', border=1, justify='center')
-    html += '</body></html>'
-    return html.encode('utf-8')
+    """Generates a simple HTML report (assembled with a single join; insights are HTML-escaped)."""
+    items = ''.join([f'<li>{escape(ins)}</li>' for ins in insights])
+    # Truncate data if too wide (to_html cost grows with rows x cols)
+    max_cols = 20
+    df_preview = df.head(100)
+    cols_note = ''
+    if df_preview.shape[1] > max_cols:
+        df_preview = df_preview.iloc[:, :max_cols]
+        cols_note = f'<p><i>(Showing first {max_cols} columns)</i></p>'
+    parts = [
+        f'<html><head><meta charset="utf-8"><title>{t("title")}</title></head><body>',
+        f'<h1>{t("title")}</h1>',
+        f'<h2>Dataset</h2><p>{t("rows")}: {df.shape[0]} | {t("cols")}: {df.shape[1]}</p>',
+        f'<h3>{t("insights")}</h3><ul>{items}</ul>',
+        f'<h3>{t("show_data")}</h3>{cols_note}',
+        preview_html(df_preview),
+        '</body></html>',
+    ]
+    return ''.join(parts).encode('utf-8')
+
+def _stamp_html_report(report: bytes) -> bytes:
+    """Adds the 'Generated:' line under the title of a cached HTML report, at download time."""
+    stamp = f'<p>Generated: {datetime.now().strftime("%Y-%m-%d %H:%M:%S")}</p>'.encode('utf-8')
+    return report.replace(b'</h1>', b'</h1>' + stamp, 1)
+
+@lru_cache(maxsize=1)
+def _pdf_styles():
+    """reportlab's sample stylesheet, built once per process."""
+    from reportlab.lib.styles import getSampleStyleSheet
+    return getSampleStyleSheet()
 
 def generate_pdf_report(df: pd.DataFrame, stats: pd.DataFrame, insights: List[str]) -> bytes:
     """Generates a professional PDF report with tables."""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.platypus import SimpleDocTemplate, Table, LongTable, TableStyle, Paragraph, Spacer
+    from reportlab.lib import colors
+    from reportlab.lib.units import inch
+
     buffer = io.BytesIO()
     doc = SimpleDocTemplate(buffer, pagesize=A4, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
-    styles = getSampleStyleSheet()
+    styles = _pdf_styles()
     story = []
 
     # Title
     story.append(Paragraph(t('title'), styles['h1']))
-    story.append(Spacer(1, 12))
-    story.append(Paragraph(f"Report Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}", styles['Normal']))
-    story.append(Spacer(1, 24))
+    story.append(Spacer(1, 36))
 
     # Insights
     story.append(Paragraph(t('insights'), styles['h2']))
-    for ins in insights:
-        story.append(Paragraph(f"• {ins}", styles['Normal']))
+    # One flowable for all bullets (laid out in a single pass); text is escaped for reportlab's markup
+    if insights:
+        story.append(Paragraph('<br/>'.join([f"• {escape(ins)}" for ins in insights]), styles['Normal']))
     story.append(Spacer(1, 24))
 
     # Statistics
@@ -607,15 +1000,11 @@ def generate_pdf_report(df: pd.DataFrame, stats: pd.DataFrame, insights: List[st
         story.append(Paragraph(t('stats_summary'), styles['h2']))
         # UPDATED: Use translated key for the index column
         stats_df_reset = stats.reset_index().rename(columns={'index': t('stat_metric')})
-        stats_data = [stats_df_reset.columns.to_list()] + stats_df_reset.values.tolist()
         
-        # Format numbers in data
-        for i in range(1, len(stats_data)):
-            for j in range(1, len(stats_data[i])):
-                try:
-                    stats_data[i][j] = f"{stats_data[i][j]:.2f}"
-                except (TypeError, ValueError):
-                    pass
+        # Format numbers column-wise (the metric-name column is left as is)
+        num_cols = stats_df_reset.columns[1:].intersection(stats_df_reset.select_dtypes(include=[np.number]).columns)
+        stats_df_reset[num_cols] = stats_df_reset[num_cols].apply(lambda col: col.map('{:.2f}'.format))
+        stats_data = [stats_df_reset.columns.to_list()] + stats_df_reset.values.tolist()
         
         t_style = TableStyle([
             ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
@@ -642,7 +1031,7 @@ def generate_pdf_report(df: pd.DataFrame, stats: pd.DataFrame, insights: List[st
         df_preview = df_preview.iloc[:, :max_cols]
         story.append(Paragraph(f"(Showing first {max_cols} columns)", styles['Italic']))
 
-    data = [df_preview.columns.to_list()] + df_preview.astype(str).values.tolist()
+    data = preview_rows(df_preview)
     
     t_style_data = TableStyle([
         ('BACKGROUND', (0, 0), (-1, 0), colors.darkblue),
@@ -655,7 +1044,8 @@ def generate_pdf_report(df: pd.DataFrame, stats: pd.DataFrame, insights: List[st
         ('FONTSIZE', (0, 0), (-1, -1), 7),
     ])
     
-    data_table = Table(data)
+    # LongTable splits across pages in linear time and repeats the header row
+    data_table = LongTable(data, repeatRows=1)
     data_table.setStyle(t_style_data)
     story.append(data_table)
 
@@ -667,19 +1057,33 @@ def generate_pdf_report(df: pd.DataFrame, stats: pd.DataFrame, insights: List[st
 # 6. AUTOMATED INSIGHTS FUNCTION (WITH CACHING)
 # ================================================
 
+def _group_sums(keys: pd.Series, values: pd.Series) -> pd.Series:
+    """
+    Sums values per key in one pass (keys in order of first appearance).
+    Keys are factorized to ints and summed with np.bincount; NaN keys and values are skipped.
+    """
+    codes, uniques = pd.factorize(keys, sort=False)
+    vals = values.to_numpy(dtype=np.float64, na_value=np.nan)
+    mask = (codes >= 0) & ~np.isnan(vals)
+    sums = np.bincount(codes[mask], weights=vals[mask], minlength=len(uniques))
+    return pd.Series(sums, index=pd.Index(uniques, name=keys.name), name=values.name)
+
 @st.cache_data
-def get_automated_insights(df: pd.DataFrame) -> Tuple[List[Tuple[str, str, str]], Dict[str, str], Optional[str], Optional[str]]:
-    """Generates a list of textual insights based on column names."""
+def get_automated_insights(df: pd.DataFrame) -> Tuple[List[Tuple[str, str, str]], Dict[str, str], Optional[str], Optional[str], Optional[pd.Series]]:
+    """
+    Generates a list of textual insights based on column names.
+    Also returns revenue per branch (if found) so the Insights tab can chart it without regrouping.
+    """
     # UPDATED: Insights is now a list of tuples (emoji, key, value)
     insights: List[Tuple[str, str, str]] = []
     insights_dict = {}
 
+    # Normalized name -> column, built once (reversed so the first matching column wins, as before)
+    lower_map = {str(col).strip().lower(): col for col in reversed(df.columns)}
+
     def safe_find(df: pd.DataFrame, possible_names: List[str]) -> Optional[str]:
-        for name in possible_names:
-            for col in df.columns:
-                if str(col).strip().lower() == str(name).strip().lower():
-                    return col
-        return None
+        return next((lower_map[key] for key in (str(name).strip().lower() for name in possible_names)
+                     if key in lower_map), None)
 
     # Detect key columns
     revenue_col = safe_find(df, ["القيمة بعد الضريبة", "صافي المبيعات", "الإيرادات", "revenue", "total revenue", "sales"])
@@ -691,44 +1095,73 @@ def get_automated_insights(df: pd.DataFrame) -> Tuple[List[Tuple[str, str, str]]
     salesman_col = safe_find(df, ["اسم المندوب", "مندوب", "salesman", "seller", "بائع"])
     product_col = safe_find(df, ["اسم الصنف", "الصنف", "product", "category"])
 
-    # Calculate totals
-    if revenue_col and pd.api.types.is_numeric_dtype(df[revenue_col]):
-        total_revenue = df[revenue_col].sum()
-        insights_dict['insight_total_revenue'] = f"{total_revenue:,.2f}"
-        insights.append(('💰', 'insight_total_revenue', f"{total_revenue:,.2f}"))
-    if discount_col and pd.api.types.is_numeric_dtype(df[discount_col]):
-        total_discount = df[discount_col].sum()
-        insights_dict['insight_total_discounts'] = f"{total_discount:,.2f}"
-        insights.append(('🎯', 'insight_total_discounts', f"{total_discount:,.2f}"))
-    if tax_col and pd.api.types.is_numeric_dtype(df[tax_col]):
-        total_tax = df[tax_col].sum()
-        insights_dict['insight_total_tax'] = f"{total_tax:,.2f}"
-        insights.append(('💸', 'insight_total_tax', f"{total_tax:,.2f}"))
-    if qty_col and pd.api.types.is_numeric_dtype(df[qty_col]):
-        total_qty = df[qty_col].sum()
-        insights_dict['insight_total_qty'] = f"{total_qty:,.2f}"
-        insights.append(('📦', 'insight_total_qty', f"{total_qty:,.2f}"))
+    # Numeric check done once for all candidate columns
+    numeric_set = set(_numeric_cols(df))
+
+    # Calculate totals in one vectorized sum over the detected numeric columns
+    total_specs = [
+        ('💰', 'insight_total_revenue', revenue_col),
+        ('🎯', 'insight_total_discounts', discount_col),
+        ('💸', 'insight_total_tax', tax_col),
+        ('📦', 'insight_total_qty', qty_col),
+    ]
+    total_cols = list(dict.fromkeys(col for _, _, col in total_specs if col in numeric_set))
+    totals = df[total_cols].sum() if total_cols else pd.Series(dtype=float)
+    for emoji, key, col in total_specs:
+        if col in numeric_set:
+            value = f"{totals[col]:,.2f}"
+            insights_dict[key] = value
+            insights.append((emoji, key, value))
 
     # Find top categories
-    if branch_col and revenue_col and pd.api.types.is_numeric_dtype(df[revenue_col]):
-        top_branch = df.groupby(branch_col)[revenue_col].sum().idxmax()
-        insights_dict['insight_top_branch'] = str(top_branch)
-        insights.append(('🏢', 'insight_top_branch', str(top_branch)))
-    if salesman_col and revenue_col and pd.api.types.is_numeric_dtype(df[revenue_col]):
-        top_salesman = df.groupby(salesman_col)[revenue_col].sum().idxmax()
-        insights_dict['insight_top_salesman'] = str(top_salesman)
-        insights.append(('🧍‍♂️', 'insight_top_salesman', str(top_salesman)))
-    if product_col and revenue_col and pd.api.types.is_numeric_dtype(df[revenue_col]):
-        top_product = df.groupby(product_col)[revenue_col].sum().idxmax()
-        insights_dict['insight_top_product'] = str(top_product)
-        insights.append(('🛒', 'insight_top_product', str(top_product)))
-
-    return insights, insights_dict, revenue_col, branch_col
+    branch_sales = None
+    if revenue_col in numeric_set:
+        leader_specs = [
+            ('🏢', 'insight_top_branch', branch_col),
+            ('🧍‍♂️', 'insight_top_salesman', salesman_col),
+            ('🛒', 'insight_top_product', product_col),
+        ]
+        for emoji, key, col in leader_specs:
+            if col:
+                sums = _group_sums(df[col], df[revenue_col])
+                if col == branch_col:
+                    branch_sales = sums
+                # Ties go to the smallest key, as with the sorted groupby().sum().idxmax()
+                try:
+                    leader = str(sums.sort_index().idxmax())
+                except TypeError:  # unorderable mixed-type keys: first key seen
+                    leader = str(sums.idxmax())
+                insights_dict[key] = leader
+                insights.append((emoji, key, leader))
+
+    return insights, insights_dict, revenue_col, branch_col, branch_sales
 
 # ================================================
 # 7. DYNAMIC PLOTTING FUNCTION (FOR DASHBOARD)
 # ================================================
 
+# Above this many rows, chart data is aggregated/sampled before plotting
+MAX_PLOT_ROWS = 50_000
+
+def _reduce_for_plot(data: pd.DataFrame, chart_type: str, x_arg: Optional[str], y_axes: List[str]) -> pd.DataFrame:
+    """
+    Shrinks large frames before they are sent to Plotly.
+    Line/Bar/Area/Pie are summed per X value; Scatter is randomly sampled; Line/Area
+    without an X column keep every k-th row (order preserved). Small frames pass through.
+    Box plots are never reduced: a sample would shift their quartiles and drop real outliers.
+    """
+    if len(data) <= MAX_PLOT_ROWS:
+        return data
+    numeric_set = set(_numeric_cols(data))
+    can_sum = bool(x_arg) and x_arg not in y_axes and all(c in numeric_set for c in y_axes)
+    if chart_type in ('Line', 'Bar', 'Area', 'Pie') and can_sum:
+        return data.groupby(x_arg, observed=True, sort=False)[y_axes].sum().reset_index()
+    if chart_type == 'Scatter':
+        return data.sample(n=MAX_PLOT_ROWS, random_state=0)
+    if chart_type in ('Line', 'Area') and not x_arg:
+        return data.iloc[::-(-len(data) // MAX_PLOT_ROWS)]
+    return data
+
 def plot_dynamic_chart(data: pd.DataFrame, chart_type: str, x_axis: Optional[str], y_axes: List[str]):
     """Helper function to generate plots for the interactive dashboard."""
     if not y_axes and chart_type not in ['Heatmap']:
@@ -738,19 +1171,22 @@ def plot_dynamic_chart(data: pd.DataFrame, chart_type: str, x_axis: Optional[str
     try:
         if chart_type in ['Line', 'Bar', 'Area', 'Scatter']:
             x_arg = x_axis if x_axis else None
-            if x_arg:
-                df_melted = data.melt(id_vars=[x_arg], value_vars=y_axes, var_name='Metric', value_name='Value')
+            data = _reduce_for_plot(data, chart_type, x_arg, y_axes)
+            # One trace per Y column straight from its own array (no melt copy / Metric column)
+            x_values = data[x_arg] if x_arg else data.index
+            if chart_type == 'Bar':
+                traces = [go.Bar(x=x_values, y=data[y], name=str(y)) for y in y_axes]
             else:
-                df_melted = data[y_axes].melt(var_name='Metric', value_name='Value')
-                
-            if chart_type == 'Line':
-                fig = px.line(df_melted, x=x_arg, y='Value', color='Metric', title=f"{chart_type} Chart")
-            elif chart_type == 'Bar':
-                fig = px.bar(df_melted, x=x_arg, y='Value', color='Metric', title=f"{chart_type} Chart", barmode='group')
-            elif chart_type == 'Area':
-                fig = px.area(df_melted, x=x_arg, y='Value', color='Metric', title=f"{chart_type} Chart")
-            elif chart_type == 'Scatter':
-                fig = px.scatter(df_melted, x=x_arg, y='Value', color='Metric', title=f"{chart_type} Chart")
+                trace_kwargs = {
+                    'Line': dict(mode='lines'),
+                    'Area': dict(mode='lines', stackgroup='one'),
+                    'Scatter': dict(mode='markers'),
+                }[chart_type]
+                traces = [go.Scatter(x=x_values, y=data[y], name=str(y), **trace_kwargs) for y in y_axes]
+            fig = go.Figure(data=traces, layout=dict(
+                title=f"{chart_type} Chart", barmode='group',
+                xaxis_title=x_arg, yaxis_title='Value', legend_title='Metric'
+            ))
             st.plotly_chart(fig, use_container_width=True)
         
         elif chart_type == 'Box':
@@ -760,17 +1196,20 @@ def plot_dynamic_chart(data: pd.DataFrame, chart_type: str, x_axis: Optional[str
         elif chart_type == 'Pie':
             names_col = x_axis if x_axis else (data.columns[0] if not data.empty else None)
             if names_col and y_axes:
+                # Plotly sums slices per name anyway, so pre-summing only the value column is exact
+                data = _reduce_for_plot(data, chart_type, names_col, y_axes[:1])
                 fig = px.pie(data, names=names_col, values=y_axes[0], title=f"Pie Chart: {y_axes[0]}")
                 st.plotly_chart(fig, use_container_width=True)
             else:
                 st.warning("Please select an X-Axis (for labels) and at least one Y-Axis (for values).")
         
         elif chart_type == 'Heatmap':
-            num_df = data.select_dtypes(include=[np.number])
+            num_df = data.iloc[:, _numeric_positions(data)]
             if num_df.shape[1] < 2:
                 st.warning(t('no_corr'))
             else:
-                corr = num_df.corr()
+                # Beyond ~50 columns the heatmap is unreadable; keep the most variable ones
+                corr = correlation_matrix(num_df, max_cols=50 if num_df.shape[1] > 100 else None)
                 fig = px.imshow(corr, text_auto=True, aspect="auto", title="Correlation Heatmap")
                 st.plotly_chart(fig, use_container_width=True)
 
@@ -782,6 +1221,8 @@ def plot_dynamic_chart(data: pd.DataFrame, chart_type: str, x_axis: Optional[str
 # ================================================
 
 def main():
+    # Bind the active language once for this render (rebound below if the user switches)
+    t = get_translator(st.session_state.get('lang', 'en'))
     
     # --- Sidebar ---
     with st.sidebar:
@@ -790,6 +1231,7 @@ def main():
         lang_index = 1 if st.session_state.get('lang', 'en') == 'ar' else 0
         lang = st.selectbox(t('language'), options=lang_options, index=lang_index)
         st.session_state['lang'] = 'ar' if lang == 'Arabic' else 'en'
+        t = get_translator(st.session_state['lang'])
         
         dark = st.checkbox(t('theme'))
         if dark:
@@ -843,10 +1285,31 @@ def main():
         st.dataframe(df, use_container_width=True, height=table_height)
 
     all_cols = df.columns.tolist()
-    default_numeric = [c for c in all_cols if pd.api.types.is_numeric_dtype(df[c])]
-    default_date = next((c for c in all_cols if 'date' in str(c).lower() or 'مبيعات' in str(c).lower()), None)
+    # Numeric column positions are computed once per loaded df and kept in session state
+    if st.session_state.get('numeric_cols') is None:
+        st.session_state['numeric_cols'] = _numeric_positions(df)
+    numeric_positions = st.session_state['numeric_cols']
+    default_numeric = [all_cols[i] for i in numeric_positions]
+    default_date = detect_date_column(df)
     date_col_index = all_cols.index(default_date) + 1 if default_date else 0
     
+    # Shared analysis results, reused by the KPI, Insights and Export tabs. Stats and insights are
+    # stored per loaded df in session state, so reruns skip even the cache's DataFrame hash
+    if st.session_state.get('stats') is None:
+        st.session_state['stats'] = numeric_summary(df, numeric_positions)
+    raw_stats, totals_dict_all, grand_all = st.session_state['stats']
+    stat_df = raw_stats.rename(columns={
+        'count': t('stat_count'),
+        'mean': t('stat_mean'), # This becomes 'Average'
+        'median': t('stat_median'),
+        'max': t('stat_max'),
+        'min': t('stat_min'),
+        'std': t('stat_std')
+    })
+    if st.session_state.get('insights') is None:
+        st.session_state['insights'] = get_automated_insights(df)
+    raw_insights, raw_insights_dict, rev_col, br_col, branch_sales = st.session_state['insights']
+
     # --- Tabbed Interface ---
     tab_kpi, tab_dashboard, tab_pivot, tab_charts, tab_forecast, tab_insights, tab_export = st.tabs([
         f"📊 {t('kpi_tab')}",
@@ -872,8 +1335,7 @@ def main():
         st.markdown("---")
         
         st.subheader(f"🔹 {t('total_everything')}")
-        # Use cached function
-        totals_dict_all, grand_all = grand_totals(df)
+        # Totals come from the shared numeric_summary result above
         kpi_cols_display = list(totals_dict_all.keys())[:5] # Show up to 5
         kpi_cols = st.columns(len(kpi_cols_display) if kpi_cols_display else 1)
         for i, k in enumerate(kpi_cols_display):
@@ -884,11 +1346,14 @@ def main():
         
         st.subheader(f"🔸 {t('selected_kpis')}")
         if numeric_cols:
-            selected_df = df[numeric_cols].select_dtypes(include=[np.number])
-            if not selected_df.empty:
-                # This is a fast operation, no need to cache
-                totals_dict = selected_df.sum(numeric_only=True).to_dict()
-                grand_selected = selected_df.sum(numeric_only=True).sum()
+            numeric_set = set(default_numeric)
+            kpi_cols_selected = [c for c in numeric_cols if c in numeric_set]
+            if kpi_cols_selected and not df.empty:
+                # This is a fast operation, no need to cache: one contiguous NumPy reduction
+                kpi_arr = df[kpi_cols_selected].to_numpy(dtype=np.float64, na_value=0.0)
+                kpi_totals = kpi_arr.sum(axis=0)
+                totals_dict = dict(zip(kpi_cols_selected, kpi_totals.tolist()))
+                grand_selected = float(kpi_totals.sum())
                 
                 kpi_cols_sel = st.columns(len(totals_dict) if totals_dict else 1)
                 for i, (col, val) in enumerate(totals_dict.items()):
@@ -901,18 +1366,8 @@ def main():
 
         st.markdown("---")
         st.subheader(t('stats_summary'))
-        # Use cached function
-        stat_df = stats_summary(df)
+        # Computed (and translated) once above
         if not stat_df.empty:
-            # UPDATED: Rename columns using translations
-            stat_df = stat_df.rename(columns={
-                'count': t('stat_count'),
-                'mean': t('stat_mean'), # This becomes 'Average'
-                'median': t('stat_median'),
-                'max': t('stat_max'),
-                'min': t('stat_min'),
-                'std': t('stat_std')
-            })
             st.dataframe(stat_df.style.format("{:,.2f}"))
         else:
             st.info(t('no_numeric_stats'))
@@ -956,7 +1411,7 @@ def main():
             pivot_cols = st.multiselect(t('col_field'), options=all_cols, key='pivot_cols')
         with p2:
             pivot_value = st.selectbox(t('value_col'), options=[''] + all_cols, index=0, key='pivot_val')
-            pivot_agg = st.selectbox(t('agg_type'), options=['sum', 'mean', 'median', 'count', 'min', 'max', 'std'], index=0, key='pivot_agg')
+            pivot_agg = st.selectbox(t('agg_type'), options=PIVOT_AGGS, index=0, key='pivot_agg')
         
         if st.button(t('generate_pivot')):
             with st.spinner('Generating pivot table...'):
@@ -1009,10 +1464,7 @@ def main():
     with tab_insights:
         st.subheader(t('insights'))
         with st.spinner('Generating insights...'):
-            # Use cached function
-            # UPDATED: Get raw keys from function
-            raw_insights, raw_insights_dict, rev_col, br_col = get_automated_insights(df)
-            
+            # Raw insight keys were computed once above
             # NEW: Translate the results here
             translated_insights_dict = {t(key): value for key, value in raw_insights_dict.items()}
             translated_insights_list = [(emoji, t(key), value) for emoji, key, value in raw_insights]
@@ -1027,11 +1479,12 @@ def main():
                     for emoji, key, value in translated_insights_list:
                         st.markdown(f"- {emoji} {key}: {value}")
                 
-                if rev_col and br_col and pd.api.types.is_numeric_dtype(df[rev_col]):
+                if branch_sales is not None:
                     try:
                         st.markdown("---")
                         st.subheader(f"Revenue by {br_col}")
-                        df_grouped = df.groupby(br_col, as_index=False)[rev_col].sum()
+                        # Reuse the per-branch sums from get_automated_insights (only a few rows to sort)
+                        df_grouped = branch_sales.sort_index().reset_index()
                         fig = px.bar(df_grouped, x=br_col, y=rev_col,
                                      title=f"Branch Performance", color=br_col, text_auto=".2s")
                         fig.update_layout(showlegend=False)
@@ -1043,8 +1496,8 @@ def main():
 
         st.markdown("---")
         st.subheader(t('missing_values'))
-        miss = df.isna().sum()
-        miss = miss[miss > 0]
+        # Use cached function
+        miss = missing_counts(df)
         if miss.empty:
             st.success("No missing values found.")
         else:
@@ -1052,59 +1505,58 @@ def main():
 
         st.markdown("---")
         st.subheader(t('correlations'))
-        num_df = df.select_dtypes(include=[np.number])
+        num_df = df.iloc[:, numeric_positions]
         if num_df.shape[1] >= 2:
             # FIX: Changed cmap='vlag' to 'coolwarm' to resolve ValueError
-            st.dataframe(num_df.corr().style.background_gradient(cmap='coolwarm', vmin=-1, vmax=1).format("{:,.2f}"))
+            st.dataframe(correlation_matrix(num_df).style.background_gradient(cmap='coolwarm', vmin=-1, vmax=1).format("{:,.2f}"))
         else:
             st.info(t('no_corr'))
 
     # --- 7. Export Tab ---
     with tab_export:
         st.subheader(t('export_tab'))
-        # Get cached insights and stats
-        # UPDATED: Get raw insights and translate them for the report
-        raw_insights, _, _, _ = get_automated_insights(df)
+        # Reuse the insights and translated stats computed once above
         insights = [f"{emoji} {t(key)}: {value}" for emoji, key, value in raw_insights]
-        stat_df = stats_summary(df)
-        # UPDATED: Translate stats df for the report as well
-        stat_df_translated = stat_df.rename(columns={
-            'count': t('stat_count'),
-            'mean': t('stat_mean'),
-            'median': t('stat_median'),
-            'max': t('stat_max'),
-            'min': t('stat_min'),
-            'std': t('stat_std')
-        })
+        stat_df_translated = stat_df
+        # Export files are built once per loaded df and language, not on every rerun.
+        # The cached files carry no generation time: the HTML report is stamped when downloaded,
+        # the PDF (which can't be patched after building) no longer has a "Report Generated" line.
+        if st.session_state.get('exports') is None:
+            st.session_state['exports'] = {}
+        exports = st.session_state['exports'].setdefault(st.session_state['lang'], {})
 
         # Excel Download
-        excel_data = df_to_excel_bytes({
-            'Raw_Data': df,
-            'Statistics': stat_df_translated.reset_index() # Use translated
-        })
+        if 'excel' not in exports:
+            exports['excel'] = df_to_excel_bytes({
+                'Raw_Data': df,
+                'Statistics': stat_df_translated.reset_index() # Use translated
+            })
         st.download_button(
             label=f"📥 {t('download_excel')}",
-            data=excel_data,
+            data=exports['excel'],
             file_name=f"Sales_Summary_{st.session_state.get('file_name', 'report')}.xlsx",
             mime="application/vnd.ms-excel"
         )
         
         # HTML Download
-        html_data = create_html_report(df, insights)
+        if 'html' not in exports:
+            exports['html'] = create_html_report(df, insights)
+        html_report = exports['html']
         st.download_button(
             label=f"📥 {t('download_html')}",
-            data=html_data,
+            data=lambda: _stamp_html_report(html_report),  # timestamped when clicked, not when cached
             file_name=f"Sales_Report_{st.session_state.get('file_name', 'report')}.html",
             mime="text/html"
         )
         
         # PDF Download
         try:
-            with st.spinner('Generating PDF Report...'):
-                pdf_data = generate_pdf_report(df, stat_df_translated, insights) # Use translated
+            if 'pdf' not in exports:
+                with st.spinner('Generating PDF Report...'):
+                    exports['pdf'] = generate_pdf_report(df, stat_df_translated, insights) # Use translated
             st.download_button(
                 label=f"📥 {t('download_pdf')}",
-                data=pdf_data,
+                data=exports['pdf'],
                 file_name=f"Sales_Report_{st.session_state.get('file_name', 'report')}.pdf",
                 mime="application/pdf"
             )